@@ -1,13 +1,19 @@
 import numpy as np
 from utils import (
     load_config,
+    get_planet_names,
     get_planet_colors,
     get_initial_conditions,
     get_time_settings,
-    create_acceleration_fn,
+    get_tolerance,
+    get_stride,
+    get_dtype,
+    get_sample_count,
     initialize_arrays,
+    initialize_batch_arrays,
     compute_aphelion,
     run_integration,
+    run_batch_integration,
     plot_orbit_3d
 )
 
@@ -15,49 +21,89 @@ from utils import (
 # Load and resolve config
 # ---------------------------------------------
 cfg = load_config("config.json")
-planet_name = cfg["planet"]
+planet_names = get_planet_names(cfg)
 method = cfg["numerical_method"]
-
-colors = get_planet_colors(cfg, planet_name)
-r0, v0 = get_initial_conditions(cfg, planet_name)
-# Resolve planet config block
-planet_cfg = cfg["planets"][planet_name]
-dt, t = get_time_settings(cfg, planet_cfg)
-
-
-# ---------------------------------------------
-# Create simulation arrays
-# ---------------------------------------------
-r, v = initialize_arrays(r0, v0, t)
+tolerance = get_tolerance(cfg)
+stride = get_stride(cfg)
+dtype = get_dtype(cfg)
 
 # ---------------------------------------------
 # Physics
 # ---------------------------------------------
 G = 6.6743e-11
 M_sun = 1.989e30
-acc_fn = create_acceleration_fn(G, M_sun)
+GM = G * M_sun
 
-# ---------------------------------------------
-# Run numerical integration
-# ---------------------------------------------
-run_integration(method, r, v, dt, acc_fn)
+if len(planet_names) == 1:
+    # ---------------------------------------------
+    # Single planet: create arrays and integrate
+    # ---------------------------------------------
+    planet_name = planet_names[0]
+    r0, v0 = get_initial_conditions(cfg, planet_name)
+    # Resolve planet config block
+    planet_cfg = cfg["planets"][planet_name]
+    dt, n_steps = get_time_settings(cfg, planet_cfg)
 
-# ---------------------------------------------
-# Compute aphelion
-# ---------------------------------------------
-pos_ap, vel_vec_ap, idx_ap = compute_aphelion(r, v)
-vel_ap = np.linalg.norm(vel_vec_ap)
+    rx, ry, vx, vy = initialize_arrays(r0, v0, n_steps, stride, dtype)
+    rx, ry, vx, vy = run_integration(
+        method, rx, ry, vx, vy, dt, GM, tolerance, stride, n_steps
+    )
 
-# ---------------------------------------------
-# Visualize
-# ---------------------------------------------
-plot_orbit_3d(
-    r=r,
-    v=v,
-    method_name=method,
-    planet_name=planet_name,
-    pos_aphelion=pos_ap,
-    vel_aphelion=vel_ap,
-    idx_aphelion=idx_ap,
-    colors=colors
-)
+    results = [(planet_name, rx, ry, vx, vy)]
+
+else:
+    # ---------------------------------------------
+    # Several planets: integrate them as one batch
+    # ---------------------------------------------
+    initial = [get_initial_conditions(cfg, name) for name in planet_names]
+    r0 = np.array([r0 for r0, _ in initial])
+    v0 = np.array([v0 for _, v0 in initial])
+
+    # The batch kernels step every planet with one shared time step
+    time_settings = [
+        get_time_settings(cfg, cfg["planets"][name]) for name in planet_names
+    ]
+    dt = time_settings[0][0]
+    if any(step != dt for step, _ in time_settings):
+        raise ValueError("Batched planets must share the same time_step.")
+
+    n_steps = [n for _, n in time_settings]
+    n_samples = [get_sample_count(n, stride) for n in n_steps]
+
+    rx, ry, vx, vy, offsets = initialize_batch_arrays(
+        r0, v0, n_samples, dtype
+    )
+    run_batch_integration(
+        method, rx, ry, vx, vy, offsets, n_steps, dt, GM, stride
+    )
+
+    results = [
+        (name, rx[o:o+n], ry[o:o+n], vx[o:o+n], vy[o:o+n])
+        for name, o, n in zip(planet_names, offsets, n_samples)
+    ]
+
+for planet_name, rx, ry, vx, vy in results:
+    colors = get_planet_colors(cfg, planet_name)
+
+    # ---------------------------------------------
+    # Compute aphelion
+    # ---------------------------------------------
+    pos_ap, vel_vec_ap, idx_ap = compute_aphelion(rx, ry, vx, vy)
+    vel_ap = np.linalg.norm(vel_vec_ap)
+
+    # ---------------------------------------------
+    # Visualize
+    # ---------------------------------------------
+    r = np.column_stack([rx, ry])
+    v = np.column_stack([vx, vy])
+
+    plot_orbit_3d(
+        r=r,
+        v=v,
+        method_name=method,
+        planet_name=planet_name,
+        pos_aphelion=pos_ap,
+        vel_aphelion=vel_ap,
+        idx_aphelion=idx_ap,
+        colors=colors
+    )
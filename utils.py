@@ -1,15 +1,43 @@
+import copy
+import functools
 import json
+import math
+import os
 import numpy as np
 from matplotlib import pyplot as plt
+from numba import njit, prange
 
 # ---------------------------------------------
 # Load JSON Configuration
 # ---------------------------------------------
 def load_config(path):
+    """
+    Parse the JSON config. Repeated calls (notebooks, parameter sweeps)
+    skip the file read and parse until the file's modification time
+    changes; each call gets its own copy, so callers may edit it freely.
+    """
+    path = os.path.abspath(path)
+    return copy.deepcopy(_load_config_cached(path, os.path.getmtime(path)))
+
+
+@functools.lru_cache(maxsize=8)
+def _load_config_cached(path, mtime):
     with open(path, "r") as f:
         return json.load(f)
 
 
+# ---------------------------------------------
+# Planet selection (single name, list of names or "all")
+# ---------------------------------------------
+def get_planet_names(cfg):
+    planet = cfg["planet"]
+    if planet == "all":
+        return list(cfg["planets"])
+    if isinstance(planet, str):
+        return [planet]
+    return list(planet)
+
+
 # ---------------------------------------------
 # Planet color resolution (merge global + per-planet)
 # ---------------------------------------------
@@ -40,10 +68,10 @@ def get_time_settings(cfg, planet_cfg):
     """
     Uses planet-specific orbital_period_days if present.
     Otherwise falls back to Earth default (365 days).
+    Returns the time step and the number of time samples.
     """
 
-    time_step = cfg["numerical_method_settings"]["time_step"] \
-        if "numerical_method_settings" in cfg else 3600
+    time_step = cfg.get("numerical_method_settings", {}).get("time_step", 3600)
 
     sim_days = planet_cfg.get(
         "orbital_period_days",
@@ -51,108 +79,691 @@ def get_time_settings(cfg, planet_cfg):
     )
 
     t_max = sim_days * 24 * 3600
-    t = np.arange(0, t_max, time_step)
+    # same count as len(np.arange(0, t_max, time_step)), without the array
+    n_steps = math.ceil(t_max / time_step)
 
-    return time_step, t
+    return time_step, n_steps
+
+
+# ----------------------------------------------------------
+# Adaptive step tolerance
+# ----------------------------------------------------------
+def get_tolerance(cfg):
+    """
+    Relative local error tolerance for the adaptive (rkdp54) method.
+    Defaults to 1e-12 when not set in numerical_method_settings.
+    """
+    return cfg.get("numerical_method_settings", {}).get("tolerance", 1e-12)
+
+
+# ----------------------------------------------------------
+# Output decimation
+# ----------------------------------------------------------
+def get_stride(cfg):
+    """
+    Keep only every stride-th integration step in the output arrays.
+    Defaults to 1 (store every step).
+    """
+    stride = cfg.get("stride", 1)
+
+    if isinstance(stride, bool) or not isinstance(stride, int) or stride < 1:
+        raise ValueError(
+            f"Invalid stride {stride!r}. Use an integer of 1 or more."
+        )
+
+    return stride
+
+
+# ----------------------------------------------------------
+# Storage precision
+# ----------------------------------------------------------
+def get_dtype(cfg):
+    """
+    Floating-point type of the stored trajectory ("float64" or "float32").
+    float32 halves memory and bandwidth; the kernels still step in float64.
+    """
+    dtype = cfg.get("dtype", "float64")
+
+    if dtype not in ("float64", "float32"):
+        raise ValueError(
+            f"Unsupported dtype '{dtype}'. Use 'float64' or 'float32'."
+        )
+
+    return np.dtype(dtype)
 
 # ---------------------------------------------
-# Create the gravitational acceleration function
+# Gravitational acceleration
 # ---------------------------------------------
-def create_acceleration_fn(G, M):
-    def acc_fn(r_vec):
-        norm = np.linalg.norm(r_vec)
-        return -(G * M / norm**3) * r_vec
-    return acc_fn
+@njit(cache=True, fastmath=True)
+def acc_scalar(rx, ry, GM):
+    """Gravitational acceleration (ax, ay) at (rx, ry), on plain floats."""
+    # Keep the pow form: under fastmath LLVM lowers it to one sqrt and one
+    # division with sqrt(r2) and r2*r2 in parallel. Writing
+    # 1.0 / (r2 * math.sqrt(r2)) serialises them and adds Numba's
+    # ZeroDivisionError check, which measured ~20% slower.
+    inv_r3 = (rx*rx + ry*ry) ** -1.5
+    k = -GM * inv_r3
+    return k * rx, k * ry
 
 
 # ---------------------------------------------
 # Pre-allocate and set initial arrays
 # ---------------------------------------------
-def initialize_arrays(r0, v0, t):
-    r = np.zeros((len(t), 2))
-    v = np.zeros((len(t), 2))
+def get_sample_count(n_steps, stride=1):
+    """
+    Number of stored samples when keeping every stride-th of n_steps,
+    plus the final step when (n_steps - 1) is not a multiple of stride.
+    """
+    return (n_steps - 1 + stride - 1) // stride + 1
+
+
+def initialize_arrays(r0, v0, n_steps, stride=1, dtype=np.float64):
+    """
+    Allocate the state as four 1-D component arrays (rx, ry, vx, vy)
+    so each component is contiguous for the integration kernels.
+    Only every stride-th time step (and the final one) gets a slot.
+    """
+    n = get_sample_count(n_steps, stride)
+    rx = np.empty(n, dtype=dtype)
+    ry = np.empty(n, dtype=dtype)
+    vx = np.empty(n, dtype=dtype)
+    vy = np.empty(n, dtype=dtype)
+
+    rx[0], ry[0] = r0
+    vx[0], vy[0] = v0
 
-    r[0] = r0
-    v[0] = v0
+    return rx, ry, vx, vy
 
-    return r, v
+
+def initialize_batch_arrays(r0, v0, n_samples, dtype=np.float64):
+    """
+    Allocate flat component arrays holding P planets back to back:
+    planet p owns samples offsets[p] to offsets[p] + n_samples[p] - 1,
+    so each trajectory is contiguous and no planet is padded to the
+    longest run. Returns (rx, ry, vx, vy, offsets).
+    """
+    n_samples = np.asarray(n_samples, dtype=np.int64)
+    offsets = np.zeros_like(n_samples)
+    np.cumsum(n_samples[:-1], out=offsets[1:])
+
+    n = int(n_samples.sum())
+    rx = np.empty(n, dtype=dtype)
+    ry = np.empty(n, dtype=dtype)
+    vx = np.empty(n, dtype=dtype)
+    vy = np.empty(n, dtype=dtype)
+
+    rx[offsets], ry[offsets] = r0[:, 0], r0[:, 1]
+    vx[offsets], vy[offsets] = v0[:, 0], v0[:, 1]
+
+    return rx, ry, vx, vy, offsets
 
 
 # -----------------------------------------------------------
 # Compute aphelion helper
 # -----------------------------------------------------------
-def compute_aphelion(r, v):
+def compute_aphelion(rx, ry, vx, vy):
     """
     Identify aphelion and ensure it is not the first point.
     """
-    distances = np.linalg.norm(r, axis=1)
+    # argmax is unaffected by the sqrt, so search squared distances
+    d2 = rx*rx + ry*ry
 
     # Raw aphelion detection
-    idx_ap = int(np.argmax(distances))
+    idx_ap = int(np.argmax(d2))
 
     # If index 0 → not a real aphelion → we need fallback
     if idx_ap == 0:
         # ignore first 5% of simulation and recompute
-        cutoff = max(1, int(len(r) * 0.05))
-        idx_ap = int(np.argmax(distances[cutoff:]) + cutoff)
+        cutoff = max(1, int(len(rx) * 0.05))
+        idx_ap = int(np.argmax(d2[cutoff:]) + cutoff)
 
-    pos_ap = distances[idx_ap]
-    vel_ap = v[idx_ap]
+    pos_ap = math.sqrt(d2[idx_ap])
+    vel_ap = (vx[idx_ap], vy[idx_ap])
 
     return pos_ap, vel_ap, idx_ap
 
 
 # -----------------------------------------------------------
-# Numerical Integration Methods (Euler + RK4)
+# Numerical Integration Methods (Euler, RK4, Verlet, RK5(4), Sundman)
 # -----------------------------------------------------------
 
-def euler_step(r_old, v_old, dt, acc_fn):
-    """Single Euler update step."""
-    a_old = acc_fn(r_old)
-    r_new = r_old + v_old * dt
-    v_new = v_old + a_old * dt
-    return r_new, v_new
+@njit(cache=True, fastmath=True)
+def euler_step_scalar(rx, ry, vx, vy, dt, GM):
+    """Single Euler update step on the four state scalars."""
+    ax, ay = acc_scalar(rx, ry, GM)
+    return rx + vx * dt, ry + vy * dt, vx + ax * dt, vy + ay * dt
+
+
+@njit(cache=True, fastmath=True)
+def rk4_step_scalar(rx, ry, vx, vy, dt, half_dt, sixth_dt, GM):
+    """
+    Single RK4 update step on the four state scalars.
+    half_dt and sixth_dt (dt / 2, dt / 6) are precomputed by the caller.
+    """
+
+    k1_vx, k1_vy = acc_scalar(rx, ry, GM)
+    k1_rx, k1_ry = vx, vy
 
+    k2_rx = vx + k1_vx * half_dt
+    k2_ry = vy + k1_vy * half_dt
+    k2_vx, k2_vy = acc_scalar(rx + k1_rx * half_dt, ry + k1_ry * half_dt, GM)
 
-def rk4_step(r_old, v_old, dt, acc_fn):
-    """Single RK4 update step."""
+    k3_rx = vx + k2_vx * half_dt
+    k3_ry = vy + k2_vy * half_dt
+    k3_vx, k3_vy = acc_scalar(rx + k2_rx * half_dt, ry + k2_ry * half_dt, GM)
 
-    k1_v = acc_fn(r_old)
-    k1_r = v_old
+    k4_rx = vx + k3_vx * dt
+    k4_ry = vy + k3_vy * dt
+    k4_vx, k4_vy = acc_scalar(rx + k3_rx * dt, ry + k3_ry * dt, GM)
+
+    return (
+        rx + sixth_dt * (k1_rx + 2*k2_rx + 2*k3_rx + k4_rx),
+        ry + sixth_dt * (k1_ry + 2*k2_ry + 2*k3_ry + k4_ry),
+        vx + sixth_dt * (k1_vx + 2*k2_vx + 2*k3_vx + k4_vx),
+        vy + sixth_dt * (k1_vy + 2*k2_vy + 2*k3_vy + k4_vy),
+    )
 
-    k2_r = v_old + k1_v * (dt / 2)
-    k2_v = acc_fn(r_old + k1_r * (dt / 2))
 
-    k3_r = v_old + k2_v * (dt / 2)
-    k3_v = acc_fn(r_old + k2_r * (dt / 2))
+@njit(cache=True, fastmath=True)
+def verlet_step_scalar(rx, ry, vx, vy, ax, ay, dt, GM):
+    """
+    Single velocity-Verlet step on the four state scalars. Takes the
+    acceleration at the current position and returns the new state
+    plus the acceleration at the new position, for reuse next step.
+    """
+    rx_new = rx + vx * dt + 0.5 * ax * dt * dt
+    ry_new = ry + vy * dt + 0.5 * ay * dt * dt
 
-    k4_r = v_old + k3_v * dt
-    k4_v = acc_fn(r_old + k3_r * dt)
+    ax_new, ay_new = acc_scalar(rx_new, ry_new, GM)
 
-    r_new = r_old + (dt / 6) * (k1_r + 2*k2_r + 2*k3_r + k4_r)
-    v_new = v_old + (dt / 6) * (k1_v + 2*k2_v + 2*k3_v + k4_v)
+    vx_new = vx + 0.5 * (ax + ax_new) * dt
+    vy_new = vy + 0.5 * (ay + ay_new) * dt
 
-    return r_new, v_new
+    return rx_new, ry_new, vx_new, vy_new, ax_new, ay_new
 
 
-def run_integration(method, r, v, dt, acc_fn):
+@njit(cache=True, fastmath=True)
+def _euler_loop(rx, ry, vx, vy, n_steps, stride, dt, GM):
+    """
+    Compiled Euler time loop on the 1-D state arrays, storing every
+    stride-th of n_steps steps and the final one. Mutates them in place.
+    """
+    x, y = float(rx[0]), float(ry[0])
+    u, w = float(vx[0]), float(vy[0])
+    remaining = n_steps - 1
+
+    for i in range(1, rx.shape[0]):
+        block = min(stride, remaining)
+        remaining -= block
+        for _ in range(block):
+            x, y, u, w = euler_step_scalar(x, y, u, w, dt, GM)
+        rx[i], ry[i] = x, y
+        vx[i], vy[i] = u, w
+
+
+# Explicit signatures: the default RK4 kernel is compiled (or loaded from
+# the on-disk cache) at import time instead of on its first call.
+# GM and dt stay runtime arguments: they are loop-invariant, so baking
+# them in as constants (one closure per planet/time step) gained ~1%
+# but cost a fresh compile per (GM, dt) pair.
+@njit(
+    [
+        "void(f8[::1], f8[::1], f8[::1], f8[::1], i8, i8, f8, f8)",
+        "void(f4[::1], f4[::1], f4[::1], f4[::1], i8, i8, f8, f8)",
+    ],
+    cache=True, fastmath=True
+)
+def _rk4_loop(rx, ry, vx, vy, n_steps, stride, dt, GM):
     """
-    Run either Euler or RK4 integration across all timesteps.
-    Mutates r[] and v[] in place.
+    Compiled RK4 time loop on the 1-D state arrays, storing every
+    stride-th of n_steps steps and the final one. Mutates them in place.
+    """
+    x, y = float(rx[0]), float(ry[0])
+    u, w = float(vx[0]), float(vy[0])
+    half_dt, sixth_dt = 0.5 * dt, dt / 6.0
+    remaining = n_steps - 1
+
+    for i in range(1, rx.shape[0]):
+        block = min(stride, remaining)
+        remaining -= block
+        for _ in range(block):
+            x, y, u, w = rk4_step_scalar(x, y, u, w, dt, half_dt, sixth_dt, GM)
+        rx[i], ry[i] = x, y
+        vx[i], vy[i] = u, w
+
+
+@njit(cache=True, fastmath=True)
+def _verlet_loop(rx, ry, vx, vy, n_steps, stride, dt, GM):
+    """
+    Compiled velocity-Verlet time loop on the 1-D state arrays, storing
+    every stride-th of n_steps steps and the final one. Mutates them in
+    place.
+    """
+    x, y = float(rx[0]), float(ry[0])
+    u, w = float(vx[0]), float(vy[0])
+    ax, ay = acc_scalar(x, y, GM)
+    remaining = n_steps - 1
+
+    for i in range(1, rx.shape[0]):
+        block = min(stride, remaining)
+        remaining -= block
+        for _ in range(block):
+            x, y, u, w, ax, ay = verlet_step_scalar(x, y, u, w, ax, ay, dt, GM)
+        rx[i], ry[i] = x, y
+        vx[i], vy[i] = u, w
+
+
+@njit(cache=True, fastmath=True)
+def rkdp54_step_scalar(rx, ry, vx, vy, a1x, a1y, dt, GM):
+    """
+    Single Dormand-Prince RK5(4) step on the four state scalars.
+    Takes the acceleration at the current position and returns the
+    5th-order state, the acceleration there (FSAL, the next step's
+    first stage) and the position and velocity error estimates
+    (difference to the embedded 4th-order solution).
     """
 
-    method = method.lower()
+    # Stage derivatives: position rate (p) and acceleration (a)
+    p1x, p1y = vx, vy
+
+    h = dt * (1/5)
+    p2x, p2y = vx + h*a1x, vy + h*a1y
+    a2x, a2y = acc_scalar(rx + h*p1x, ry + h*p1y, GM)
+
+    b1, b2 = dt * (3/40), dt * (9/40)
+    p3x = vx + b1*a1x + b2*a2x
+    p3y = vy + b1*a1y + b2*a2y
+    a3x, a3y = acc_scalar(rx + b1*p1x + b2*p2x, ry + b1*p1y + b2*p2y, GM)
 
-    for i in range(1, len(r)):
+    b1, b2, b3 = dt * (44/45), dt * (-56/15), dt * (32/9)
+    p4x = vx + b1*a1x + b2*a2x + b3*a3x
+    p4y = vy + b1*a1y + b2*a2y + b3*a3y
+    a4x, a4y = acc_scalar(
+        rx + b1*p1x + b2*p2x + b3*p3x,
+        ry + b1*p1y + b2*p2y + b3*p3y, GM
+    )
+
+    b1, b2, b3, b4 = (
+        dt * (19372/6561), dt * (-25360/2187),
+        dt * (64448/6561), dt * (-212/729)
+    )
+    p5x = vx + b1*a1x + b2*a2x + b3*a3x + b4*a4x
+    p5y = vy + b1*a1y + b2*a2y + b3*a3y + b4*a4y
+    a5x, a5y = acc_scalar(
+        rx + b1*p1x + b2*p2x + b3*p3x + b4*p4x,
+        ry + b1*p1y + b2*p2y + b3*p3y + b4*p4y, GM
+    )
+
+    b1, b2, b3, b4, b5 = (
+        dt * (9017/3168), dt * (-355/33), dt * (46732/5247),
+        dt * (49/176), dt * (-5103/18656)
+    )
+    p6x = vx + b1*a1x + b2*a2x + b3*a3x + b4*a4x + b5*a5x
+    p6y = vy + b1*a1y + b2*a2y + b3*a3y + b4*a4y + b5*a5y
+    a6x, a6y = acc_scalar(
+        rx + b1*p1x + b2*p2x + b3*p3x + b4*p4x + b5*p5x,
+        ry + b1*p1y + b2*p2y + b3*p3y + b4*p4y + b5*p5y, GM
+    )
+
+    # 5th-order solution
+    b1, b3, b4, b5, b6 = (
+        dt * (35/384), dt * (500/1113), dt * (125/192),
+        dt * (-2187/6784), dt * (11/84)
+    )
+    rx_new = rx + b1*p1x + b3*p3x + b4*p4x + b5*p5x + b6*p6x
+    ry_new = ry + b1*p1y + b3*p3y + b4*p4y + b5*p5y + b6*p6y
+    vx_new = vx + b1*a1x + b3*a3x + b4*a4x + b5*a5x + b6*a6x
+    vy_new = vy + b1*a1y + b3*a3y + b4*a4y + b5*a5y + b6*a6y
+
+    # 7th stage at the new state (FSAL), needed by the 4th-order weights
+    p7x, p7y = vx_new, vy_new
+    a7x, a7y = acc_scalar(rx_new, ry_new, GM)
+
+    # Error weights: 5th-order minus embedded 4th-order b_j
+    e1, e3, e4, e5, e6, e7 = (
+        dt * (71/57600), dt * (-71/16695), dt * (71/1920),
+        dt * (-17253/339200), dt * (22/525), dt * (-1/40)
+    )
+    err_r = math.hypot(
+        e1*p1x + e3*p3x + e4*p4x + e5*p5x + e6*p6x + e7*p7x,
+        e1*p1y + e3*p3y + e4*p4y + e5*p5y + e6*p6y + e7*p7y
+    )
+    err_v = math.hypot(
+        e1*a1x + e3*a3x + e4*a4x + e5*a5x + e6*a6x + e7*a7x,
+        e1*a1y + e3*a3y + e4*a4y + e5*a5y + e6*a6y + e7*a7y
+    )
 
-        if method == "euler":
-            r[i], v[i] = euler_step(r[i-1], v[i-1], dt, acc_fn)
+    return rx_new, ry_new, vx_new, vy_new, a7x, a7y, err_r, err_v
 
-        elif method == "rk4":
-            r[i], v[i] = rk4_step(r[i-1], v[i-1], dt, acc_fn)
 
+# Initial sample capacity of the variable-step (rkdp54, sundman) drivers
+_VARIABLE_STEP_BUFFER = 1024
+
+
+@njit(cache=True, fastmath=True)
+def _rkdp54_loop(rx, ry, vx, vy, i, t, state, dt, t_end, save_dt, GM, tol):
+    """
+    Compiled adaptive RK5(4) loop. Starts from the float64 state
+    (x, y, u, w) stored at sample i and time t, and writes the first
+    accepted step past each multiple of save_dt (and the final one)
+    until t_end or until the arrays are full.
+    Returns (last written index, time reached, state, next step size).
+    """
+    x, y, u, w = state
+    n = rx.shape[0]
+    t_save = (math.floor(t / save_dt) + 1.0) * save_dt
+    ax, ay = acc_scalar(x, y, GM)
+
+    while t < t_end and i < n - 1:
+        last = dt >= t_end - t
+        h = t_end - t if last else dt
+
+        x5, y5, u5, w5, ax5, ay5, err_r, err_v = rkdp54_step_scalar(
+            x, y, u, w, ax, ay, h, GM
+        )
+
+        # Local error relative to the current |r| and |v|
+        err = max(err_r / math.hypot(x, y), err_v / math.hypot(u, w)) / tol
+
+        if err <= 1.0:
+            t = t_end if last else t + h
+            x, y, u, w = x5, y5, u5, w5
+            ax, ay = ax5, ay5
+            if t >= t_save or last:
+                t_save = (math.floor(t / save_dt) + 1.0) * save_dt
+                i += 1
+                rx[i], ry[i] = x, y
+                vx[i], vy[i] = u, w
+
+        # Step-size controller, growth clamped to [0.25, 4]
+        if err == 0.0:
+            dt = 4.0 * h
         else:
-            raise ValueError(f"Unknown numerical method '{method}'. Use 'euler' or 'rk4'.")
+            dt = min(max(0.9 * err ** -0.2, 0.25), 4.0) * h
+
+    return i, t, (x, y, u, w), dt
+
+
+@njit(cache=True, fastmath=True)
+def _sundman_rhs(rx, ry, vx, vy, GM):
+    """
+    Equations of motion in Sundman time tau, with dt = g * dtau and
+    g = r^1.5. Returns d/dtau of (rx, ry, vx, vy, t).
+    """
+    r2 = rx*rx + ry*ry
+    g = r2 ** 0.75
+    k = -GM / g    # g * (-GM / r^3)
+    return g * vx, g * vy, k * rx, k * ry, g
+
+
+@njit(cache=True, fastmath=True)
+def sundman_step_scalar(rx, ry, vx, vy, dtau, half_dtau, sixth_dtau, GM):
+    """
+    Single RK4 step of size dtau in Sundman time on the four state
+    scalars. half_dtau and sixth_dtau are precomputed by the caller.
+    Returns the new state and the physical time elapsed.
+    """
+    k1x, k1y, k1u, k1w, k1t = _sundman_rhs(rx, ry, vx, vy, GM)
+
+    k2x, k2y, k2u, k2w, k2t = _sundman_rhs(
+        rx + half_dtau*k1x, ry + half_dtau*k1y,
+        vx + half_dtau*k1u, vy + half_dtau*k1w, GM
+    )
+    k3x, k3y, k3u, k3w, k3t = _sundman_rhs(
+        rx + half_dtau*k2x, ry + half_dtau*k2y,
+        vx + half_dtau*k2u, vy + half_dtau*k2w, GM
+    )
+    k4x, k4y, k4u, k4w, k4t = _sundman_rhs(
+        rx + dtau*k3x, ry + dtau*k3y, vx + dtau*k3u, vy + dtau*k3w, GM
+    )
+
+    return (
+        rx + sixth_dtau * (k1x + 2*k2x + 2*k3x + k4x),
+        ry + sixth_dtau * (k1y + 2*k2y + 2*k3y + k4y),
+        vx + sixth_dtau * (k1u + 2*k2u + 2*k3u + k4u),
+        vy + sixth_dtau * (k1w + 2*k2w + 2*k3w + k4w),
+        sixth_dtau * (k1t + 2*k2t + 2*k3t + k4t),
+    )
+
+
+@njit(cache=True, fastmath=True)
+def _sundman_loop(rx, ry, vx, vy, i, t, state, dtau, t_end, save_dt, GM):
+    """
+    Compiled fixed-dtau RK4 loop in Sundman time. Starts from the
+    float64 state (x, y, u, w) stored at sample i and time t, and writes
+    the first step past each multiple of save_dt (and the final one)
+    until t reaches t_end (the last step may overshoot it) or the arrays
+    are full. Returns (last written index, time reached, state, dtau).
+    """
+    x, y, u, w = state
+    n = rx.shape[0]
+
+    half_dtau, sixth_dtau = 0.5 * dtau, dtau / 6.0
+    t_save = (math.floor(t / save_dt) + 1.0) * save_dt
+
+    while t < t_end and i < n - 1:
+        x, y, u, w, elapsed = sundman_step_scalar(
+            x, y, u, w, dtau, half_dtau, sixth_dtau, GM
+        )
+        t += elapsed
+        if t >= t_save or t >= t_end:
+            t_save = (math.floor(t / save_dt) + 1.0) * save_dt
+            i += 1
+            rx[i], ry[i] = x, y
+            vx[i], vy[i] = u, w
+
+    return i, t, (x, y, u, w), dtau
+
+
+def _run_variable_step(
+    loop, rx, ry, vx, vy, n_steps, dt, h, stride, GM, *args
+):
+    """
+    Drive a variable-step kernel over the same time span as the
+    fixed-step methods ((n_steps - 1) * dt), starting with step
+    control h. Steps are variable, so stride thins the output by time:
+    at most one sample is kept per stride * dt seconds. Storage starts
+    at _VARIABLE_STEP_BUFFER samples and is doubled whenever it fills
+    up; the result is a compact copy of the stored samples. The float64
+    state is carried across refills, so float32 buffers only round the
+    stored samples.
+    """
+    save_dt = stride * dt
+    t_end = (n_steps - 1) * dt
+    i, t = 0, 0.0
+    state = (float(rx[0]), float(ry[0]), float(vx[0]), float(vy[0]))
+
+    # Variable steps need far fewer samples than the fixed-step count
+    # the caller's arrays were sized for, so start small
+    n = min(len(rx), _VARIABLE_STEP_BUFFER)
+    rx, ry, vx, vy = (a[:n].copy() for a in (rx, ry, vx, vy))
+
+    while True:
+        i, t, state, h = loop(
+            rx, ry, vx, vy, i, t, state, h, t_end, save_dt, GM, *args
+        )
+        if t >= t_end:
+            break
+        rx, ry, vx, vy = (
+            np.concatenate((a, np.empty_like(a))) for a in (rx, ry, vx, vy)
+        )
+
+    return tuple(a[:i+1].copy() for a in (rx, ry, vx, vy))
+
+
+@njit(cache=True, fastmath=True, parallel=True)
+def _euler_batch_loop(rx, ry, vx, vy, offsets, n_steps, stride, dt, GM):
+    """
+    Compiled Euler loop on the flat batch arrays. Planets run in
+    parallel, each thread stepping planet p through its n_steps[p]
+    steps from offsets[p], storing every stride-th step and the final
+    one. Mutates the arrays in place.
+    """
+    for p in prange(offsets.shape[0]):
+        o = offsets[p]
+        x, y = float(rx[o]), float(ry[o])
+        u, w = float(vx[o]), float(vy[o])
+
+        remaining = n_steps[p] - 1
+        i = o
+
+        while remaining > 0:
+            block = min(stride, remaining)
+            remaining -= block
+            for _ in range(block):
+                x, y, u, w = euler_step_scalar(x, y, u, w, dt, GM)
+            i += 1
+            rx[i], ry[i] = x, y
+            vx[i], vy[i] = u, w
+
+
+@njit(cache=True, fastmath=True, parallel=True)
+def _rk4_batch_loop(rx, ry, vx, vy, offsets, n_steps, stride, dt, GM):
+    """
+    Compiled RK4 loop on the flat batch arrays. Planets run in
+    parallel, each thread stepping planet p through its n_steps[p]
+    steps from offsets[p], storing every stride-th step and the final
+    one. Mutates the arrays in place.
+    """
+    half_dt, sixth_dt = 0.5 * dt, dt / 6.0
+
+    for p in prange(offsets.shape[0]):
+        o = offsets[p]
+        x, y = float(rx[o]), float(ry[o])
+        u, w = float(vx[o]), float(vy[o])
+
+        remaining = n_steps[p] - 1
+        i = o
+
+        while remaining > 0:
+            block = min(stride, remaining)
+            remaining -= block
+            for _ in range(block):
+                x, y, u, w = rk4_step_scalar(
+                    x, y, u, w, dt, half_dt, sixth_dt, GM
+                )
+            i += 1
+            rx[i], ry[i] = x, y
+            vx[i], vy[i] = u, w
+
+
+@njit(cache=True, fastmath=True, parallel=True)
+def _verlet_batch_loop(rx, ry, vx, vy, offsets, n_steps, stride, dt, GM):
+    """
+    Compiled velocity-Verlet loop on the flat batch arrays. Planets run
+    in parallel, each thread stepping planet p through its n_steps[p]
+    steps from offsets[p], storing every stride-th step and the final
+    one. Mutates the arrays in place.
+    """
+    for p in prange(offsets.shape[0]):
+        o = offsets[p]
+        x, y = float(rx[o]), float(ry[o])
+        u, w = float(vx[o]), float(vy[o])
+        ax, ay = acc_scalar(x, y, GM)
+
+        remaining = n_steps[p] - 1
+        i = o
+
+        while remaining > 0:
+            block = min(stride, remaining)
+            remaining -= block
+            for _ in range(block):
+                x, y, u, w, ax, ay = verlet_step_scalar(
+                    x, y, u, w, ax, ay, dt, GM
+                )
+            i += 1
+            rx[i], ry[i] = x, y
+            vx[i], vy[i] = u, w
+
+
+# Time-loop kernel for each supported fixed-step numerical method
+_INTEGRATORS = {
+    "euler": _euler_loop,
+    "rk4": _rk4_loop,
+    "verlet": _verlet_loop,
+}
+
+
+def run_integration(
+    method, rx, ry, vx, vy, dt, GM, tolerance=1e-12, stride=1, n_steps=None
+):
+    """
+    Run Euler, RK4, velocity-Verlet, adaptive RK5(4) ('rkdp54') or
+    Sundman-time RK4 ('sundman') integration over n_steps time steps.
+    Fixed-step methods fill rx[], ry[], vx[] and vy[] in place, storing
+    every stride-th step and the final one; the variable-step methods
+    take their initial state from them.
+    GM is the precomputed gravitational parameter G * M. n_steps
+    defaults to (len(rx) - 1) * stride + 1.
+    Returns the (rx, ry, vx, vy) arrays holding the trajectory.
+    """
+
+    method = method.lower()
+    dt, GM, stride = float(dt), float(GM), int(stride)
+    if n_steps is None:
+        n_steps = (len(rx) - 1) * stride + 1
+    n_steps = int(n_steps)
+
+    if method == "rkdp54":
+        return _run_variable_step(
+            _rkdp54_loop, rx, ry, vx, vy, n_steps, dt, dt, stride, GM,
+            float(tolerance)
+        )
+
+    if method == "sundman":
+        # dtau is chosen so the first (perihelion) step lasts dt seconds
+        dtau = dt / (float(rx[0])**2 + float(ry[0])**2) ** 0.75
+        return _run_variable_step(
+            _sundman_loop, rx, ry, vx, vy, n_steps, dt, dtau, stride, GM
+        )
+
+    if method not in _INTEGRATORS:
+        raise ValueError(
+            f"Unknown numerical method '{method}'. "
+            "Use 'euler', 'rk4', 'verlet', 'rkdp54' or 'sundman'."
+        )
+
+    loop = _INTEGRATORS[method]
+    loop(rx, ry, vx, vy, n_steps, stride, dt, GM)
+
+    return rx, ry, vx, vy
+
+
+# Batched (multi-planet) time-loop kernels
+_BATCH_INTEGRATORS = {
+    "euler": _euler_batch_loop,
+    "rk4": _rk4_batch_loop,
+    "verlet": _verlet_batch_loop,
+}
+
+
+def run_batch_integration(
+    method, rx, ry, vx, vy, offsets, n_steps, dt, GM, stride=1
+):
+    """
+    Run Euler, RK4 or velocity-Verlet integration for several planets at
+    once, one planet per thread.
+    rx[], ry[], vx[] and vy[] are the flat arrays from
+    initialize_batch_arrays; planet p takes n_steps[p] time steps and
+    stores every stride-th one, plus the final one, from offsets[p].
+    Mutates them in place.
+    """
+
+    method = method.lower()
+
+    if method not in _BATCH_INTEGRATORS:
+        raise ValueError(
+            f"Numerical method '{method}' does not support multiple planets. "
+            "Use 'euler', 'rk4' or 'verlet'."
+        )
+
+    loop = _BATCH_INTEGRATORS[method]
+    loop(
+        rx, ry, vx, vy,
+        np.asarray(offsets, dtype=np.int64),
+        np.asarray(n_steps, dtype=np.int64),
+        int(stride), float(dt), float(GM)
+    )
 
 
 # -----------------------------------------------------------
@@ -167,7 +778,7 @@ def plot_orbit_3d(
     print("r[0] (perihelion):", r[0])
     print("r[idx_aphelion] (aphelion):", r[idx_aphelion])
     print("Max distance (m):", pos_aphelion)
-    print("Distance at perihelion:", np.linalg.norm(r[0]))
+    print("Distance at perihelion:", math.hypot(r[0, 0], r[0, 1]))
     plt.style.use(colors.get("background", "dark_background"))
     fig = plt.figure(figsize=(7, 12))
     ax = fig.add_subplot(111, projection="3d")
@@ -187,10 +798,15 @@ def plot_orbit_3d(
     )
 
     # ----------------------------
-    # Orbit path
+    # Orbit path (thinned to ~20k points; more adds nothing on screen)
     # ----------------------------
+    plot_stride = max(1, len(r) // 20000)
+    r_line = r[::plot_stride]
+    # keep the last sample so the plotted orbit still closes
+    if (len(r) - 1) % plot_stride:
+        r_line = np.vstack((r_line, r[-1]))
     ax.plot(
-        r[:, 0], r[:, 1], 0,
+        r_line[:, 0], r_line[:, 1], 0,
         lw=2,
         color=colors.get("orbit", "white"),
         label=f"{planet_name} Orbit"
@@ -210,17 +826,18 @@ def plot_orbit_3d(
     # PERIHELION (offset outward)
     # ----------------------------
     px, py = r[0]
-    radius = np.linalg.norm([px, py])   # distance from Sun
+    radius = math.hypot(px, py)   # distance from Sun
 
     # small outward offset (0.2%)
     peri_offset = 0.002 * radius
-    direction = np.array([px, py]) / radius
+    ux, uy = px / radius, py / radius
 
-    perihelion_point = np.array([px, py]) + direction * peri_offset
+    peri_x = px + ux * peri_offset
+    peri_y = py + uy * peri_offset
 
     ax.scatter(
-        perihelion_point[0],
-        perihelion_point[1],
+        peri_x,
+        peri_y,
         0,
         s=200,
         color=colors.get("perihelion", "cyan"),